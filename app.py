@@ -1,23 +1,22 @@
 import streamlit as st
-import pandas as pd
 import os
-import zipfile
 import io
 import tempfile
-import hashlib
 import re
 import logging
 import sys
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from PIL import Image
-from datetime import datetime
 
-# Add src to path
-sys.path.append(str(Path(__file__).parent))
+# Make the project root importable (for `src.*`) once, not on every rerun
+PROJECT_ROOT = str(Path(__file__).parent)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
 
-from src.data_cleaner import DataCleaner
-from src.image_processor import ImageProcessor
-from src.field_config import STANDARD_FIELDS, get_field_options_by_category
+# pandas, Pillow, zipfile and DataCleaner (google-genai) are imported lazily where
+# they are used, so a cold start only pays for the tab the user actually touches
+from src.field_config import detect_standard_field, get_field_options_by_category
 
 # ========== Configuration & Setup ==========
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,9 +25,27 @@ logger = logging.getLogger(__name__)
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 MAX_FILES = 50
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB per image
+MAX_IMAGE_PIXELS = 100_000_000  # 100MP, checked from the header before any decode
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s.-]')
+ZIP_SPOOL_SIZE = 4 * 1024 * 1024  # Keep ZIPs under 4MB in RAM, spill larger ones to disk
+# Bound the upload/API-key caches: entries expire after an hour (this also keeps
+# "today"/"yesterday" relative dates from going stale) and only a few are kept
+CACHE_TTL_SECONDS = 60 * 60
+CACHE_MAX_ENTRIES = 8
 ALLOWED_EXCEL_EXTENSIONS = ['.xlsx', '.xls']
-
-st.set_page_config(
+EXCEL_MAGIC_NUMBERS = {
+    '.xlsx': b'PK\x03\x04',        # ZIP container
+    '.xls': b'\xd0\xcf\x11\xe0',   # OLE2 compound document
+}
+IMAGE_MAGIC_NUMBERS = (b'\xff\xd8\xff', b'\x89PNG')  # JPEG, PNG
+IMAGE_OPEN_FORMATS = ("JPEG", "PNG")  # Only probe the decoders we accept
+RESAMPLING_OPTIONS = {
+    "Fast (Bilinear)": "BILINEAR",
+    "Balanced (Bicubic)": "BICUBIC",
+    "Best (Lanczos)": "LANCZOS",
+}
+
+PAGE_CONFIG = dict(
     page_title="Automated Info Pipeline",
     page_icon="🚀",
     layout="wide",
@@ -41,174 +58,123 @@ st.set_page_config(
 )
 
 # ========== Premium Design System ==========
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-
-    /* Global Reset & Typography */
-    .stApp {
-        background-color: #f8fafc; /* Slate 50 */
-        font-family: 'Inter', sans-serif;
-    }
+@st.cache_data(show_spinner=False)
+def load_css():
+    """Read the stylesheet from disk once per process"""
+    return (Path(__file__).parent / "static" / "style.css").read_text(encoding="utf-8")
 
-    h1, h2, h3 {
-        font-family: 'Inter', sans-serif;
-        color: #1e293b; /* Slate 800 */
-    }
 
-    /* Header Styling */
-    .hero-section {
-        background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
-        padding: 3rem 2rem;
-        border-radius: 16px;
-        margin-bottom: 2rem;
-        color: white;
-        box-shadow: 0 10px 25px -5px rgba(59, 130, 246, 0.3);
-        text-align: center;
-    }
+@st.cache_resource(show_spinner=False)
+def inject_global_styles():
+    """Inject the design system once; Streamlit replays the cached element on reruns"""
+    st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
-    .hero-title {
-        font-size: 2.5rem;
-        font-weight: 700;
-        margin-bottom: 0.5rem;
-        color: white !important;
-    }
 
-    .hero-subtitle {
-        font-size: 1.1rem;
-        opacity: 0.9;
-        font-weight: 400;
-        max-width: 600px;
-        margin: 0 auto;
-    }
+# ========== Utility Functions ==========
+def sanitize_filename(filename):
+    """Clean filename to prevent path traversal"""
+    filename = UNSAFE_FILENAME_CHARS.sub('', os.path.basename(filename))[:100]
+    return filename or "unnamed"
 
-    /* Card Styling */
-    .feature-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 12px;
-        border: 1px solid #e2e8f0;
-        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.05);
-        height: 100%;
-        transition: transform 0.2s ease, box-shadow 0.2s ease;
-    }
 
-    .feature-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1);
-    }
+def validate_file_magic(file_obj, expected_magic):
+    """Validate file magic numbers (expected_magic may be a tuple of prefixes)"""
+    # Peek at the in-memory upload through a memoryview: no seek/read, pointer untouched.
+    # The view is released on exit so the BytesIO stays resizable.
+    with file_obj.getbuffer() as buf:
+        magic = bytes(buf[:4])
+    if not magic:
+        return False
+    return magic.startswith(expected_magic)
 
-    /* Tab Styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-        background-color: white;
-        padding: 0.5rem;
-        border-radius: 12px;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.05);
-    }
 
-    .stTabs [data-baseweb="tab"] {
-        height: 48px;
-        white-space: pre-wrap;
-        background-color: transparent;
-        border-radius: 8px;
-        color: #64748b;
-        font-weight: 500;
-        padding: 0 24px;
-        border: none;
-    }
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES)
+def read_excel_cached(file_bytes):
+    """Parse uploaded Excel bytes; memoized on content so reruns skip openpyxl"""
+    import pandas as pd
+    from src.data_cleaner import EXCEL_READ_ENGINE
+    return pd.read_excel(io.BytesIO(file_bytes), engine=EXCEL_READ_ENGINE)
 
-    .stTabs [aria-selected="true"] {
-        background-color: #eff6ff; /* Blue 50 */
-        color: #2563eb; /* Blue 600 */
-        font-weight: 600;
-    }
 
-    /* Button Styling */
-    .stButton > button {
-        background: linear-gradient(to right, #3b82f6, #2563eb);
-        color: white;
-        border: none;
-        padding: 0.6rem 1.5rem;
-        font-weight: 600;
-        border-radius: 8px;
-        transition: all 0.2s;
-        width: 100%;
-    }
+@st.cache_resource(show_spinner=False, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES)
+def get_cleaner(api_key):
+    """One DataCleaner (and Gemini client) per API key, shared across reruns and sessions"""
+    from src.data_cleaner import DataCleaner
+    return DataCleaner(api_key=api_key)
 
-    .stButton > button:hover {
-        opacity: 0.9;
-        transform: scale(1.02);
-        box-shadow: 0 4px 12px rgba(37, 99, 235, 0.2);
-    }
 
-    /* File Uploader */
-    .stFileUploader section {
-        background-color: white;
-        border: 2px dashed #cbd5e1;
-        border-radius: 12px;
-        padding: 2rem;
-    }
+class UncachedCleaningResult(Exception):
+    """Carries a cleaning result out of clean_excel_cached without it being memoized"""
 
-    /* Metrics & Stats */
-    .stat-container {
-        display: flex;
-        gap: 1rem;
-        margin-bottom: 1.5rem;
-    }
+    def __init__(self, result):
+        super().__init__("AI summary failed; result not cached")
+        self.result = result
 
-    .stat-chip {
-        background-color: #f0fdf4; /* Green 50 */
-        color: #166534; /* Green 800 */
-        padding: 0.5rem 1rem;
-        border-radius: 9999px;
-        font-size: 0.875rem;
-        font-weight: 600;
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-        border: 1px solid #bbf7d0;
-    }
 
-    .stat-chip.blue {
-        background-color: #eff6ff;
-        color: #1e40af;
-        border-color: #bfdbfe;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES)
+def clean_excel_cached(file_bytes, api_key, user_mapping):
+    """
+    Run the cleaning pipeline once per (file, key, mapping) combination.
+    A transient AI-summary failure is raised as UncachedCleaningResult, since
+    Streamlit does not cache exceptions, so the next click retries the summary.
+    """
+    from src.data_cleaner import is_summary_error
 
+    # Reuses the memoized full parse from the preview (cache_data hands back a copy)
+    df = read_excel_cached(file_bytes)
+    # clean_excel keeps no per-call state on the instance, so sharing it is safe
+    cleaner = get_cleaner(api_key)
+    df_cleaned, summary = cleaner.clean_excel(df, user_mapping=user_mapping)
+    if is_summary_error(summary):
+        raise UncachedCleaningResult((df_cleaned, summary))
+    return df_cleaned, summary
 
-# ========== Utility Functions ==========
-def sanitize_filename(filename):
-    """Clean filename to prevent path traversal"""
-    filename = os.path.basename(filename)
-    filename = re.sub(r'[^\w\s.-]', '', filename)
-    filename = filename[:100]
-    return filename if filename else "unnamed"
 
+def downcast_dataframe(df):
+    """
+    Shrink a cleaned DataFrame before display/export.
+    Integers are downcast and low-cardinality text becomes categorical. Floats are
+    left at float64 so the exported workbook keeps the exact values. Mixed-type
+    columns stay object: Streamlit can convert those for display, but not a
+    categorical with mixed-type categories.
+    """
+    import pandas as pd
 
-def validate_file_magic(file_obj, expected_magic):
-    """Validate file magic numbers"""
-    file_obj.seek(0)
-    magic = file_obj.read(4)
-    file_obj.seek(0)
-    if not magic:
-        return False
-    return magic.startswith(expected_magic)
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    # 'string' covers pandas 3's default str dtype and the Arrow strings from cleaning
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        if pd.api.types.infer_dtype(df[col], skipna=True) != 'string':
+            continue
+        nunique = df[col].nunique(dropna=True)
+        if nunique and nunique / len(df) < 0.5:
+            df[col] = df[col].astype('category')
+    return df
 
 
-def save_uploaded_file_secure(uploaded_file, extension):
-    """Securely save uploaded file"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_hash = hashlib.md5(uploaded_file.getvalue()).hexdigest()[:8]
-    safe_filename = f"temp_{timestamp}_{file_hash}{extension}"
-    temp_dir = tempfile.gettempdir()
-    temp_path = os.path.join(temp_dir, safe_filename)
+def to_excel_bytes(df):
+    """
+    Serialize a DataFrame to .xlsx bytes for download.
+    Not constant_memory: pandas writes column by column, and that mode drops any
+    cell written out of row order.
+    """
+    import pandas as pd
 
-    with open(temp_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    return temp_path
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter', engine_kwargs={'options': {'use_zip64': True}}) as writer:
+        df.to_excel(writer, index=False)
+    return output.getvalue()
+
+
+@st.cache_resource(show_spinner=False)
+def log_image_backend():
+    """Log the Pillow build once per process, on first use of the image tab"""
+    from PIL import features
+    logger.info(
+        "Pillow %s loaded (libjpeg-turbo: %s)",
+        features.version('pil'),
+        features.check_feature('libjpeg_turbo')
+    )
 
 
 def get_api_key_safely():
@@ -221,57 +187,113 @@ def get_api_key_safely():
         return None
 
 
-def detect_standard_field(column_name):
+# Mapping dropdown options, built once instead of on every rerun
+FIELD_OPTIONS = get_field_options_by_category()
+FIELD_LABELS = dict(FIELD_OPTIONS)
+FIELD_KEYS_BY_LABEL = {label: key for key, label in FIELD_OPTIONS}
+
+
+@functools.lru_cache(maxsize=1)
+def load_pyvips():
+    """Return the pyvips module if it and libvips are installed, else None"""
+    try:
+        import pyvips
+        return pyvips
+    except (ImportError, OSError):
+        return None
+
+
+def encode_with_vips(pyvips, img_file, t_width, t_height, optimize):
+    """
+    libvips path: shrink-on-load, resize and JPEG encode in one streamed pipeline,
+    without materializing a full-resolution RGB copy.
+    """
+    from src.image_processor import vips_to_srgb
+
+    image = pyvips.Image.thumbnail_buffer(img_file.getvalue(), t_width, height=t_height, size="down")
+    image = vips_to_srgb(image)
+    return image.write_to_buffer(".jpg", Q=85, optimize_coding=optimize, strip=True)
+
+
+def process_single_image(img_file, t_width, t_height, resample, optimize=False):
     """
-    Automatically detect which standard field a column name matches.
-    Uses keyword matching with case-insensitive comparison.
-    
+    Decode, resize and re-encode one uploaded image as JPEG.
+    Safe to run in a worker thread; Pillow releases the GIL in its C kernels.
+
+    Uses libvips when pyvips is installed; otherwise Pillow (or Pillow-SIMD).
+
     Args:
-        column_name: The original column name from Excel
-    
+        resample: An Image.Resampling member, resolved once per batch by the caller;
+                  ignored on the libvips path, which always uses its Lanczos kernel
+
     Returns:
-        The standard field key (e.g., "SaleID") or "Ignore" if no match
+        (new_name, jpeg_bytes, error) - error is None on success
     """
-    if not column_name:
-        return "Ignore"
-    
-    # Normalize column name for matching
-    col_lower = str(column_name).lower().strip()
-    
-    # Try to match against keywords for each standard field
-    best_match = "Ignore"
-    max_match_score = 0
-    
-    for field_key, field_info in STANDARD_FIELDS.items():
-        keywords = field_info.get("keywords", [])
-        
-        for keyword in keywords:
-            keyword_lower = keyword.lower()
-            
-            # Exact match gets highest priority
-            if col_lower == keyword_lower:
-                return field_key
-            
-            # Partial match (keyword contained in column name)
-            if keyword_lower in col_lower:
-                # Score based on keyword length (longer = more specific)
-                score = len(keyword_lower)
-                if score > max_match_score:
-                    max_match_score = score
-                    best_match = field_key
-            
-            # Column name contained in keyword (less common but possible)
-            elif col_lower in keyword_lower and len(col_lower) > 2:
-                score = len(col_lower)
-                if score > max_match_score:
-                    max_match_score = score
-                    best_match = field_key
-    
-    return best_match
+    from PIL import Image
+
+    try:
+        if img_file.size > MAX_IMAGE_SIZE:
+            return None, None, f"{img_file.name}: Exceeds 5MB"
+        # Reject non-JPEG/PNG payloads from the header alone, before any Pillow work
+        if not validate_file_magic(img_file, IMAGE_MAGIC_NUMBERS):
+            return None, None, f"{img_file.name}: Not a valid PNG/JPEG file"
+
+        safe_name = sanitize_filename(img_file.name)
+        new_name = os.path.splitext(safe_name)[0] + ".jpg"
+
+        # Header-only open: pixels are not decoded until draft/convert/thumbnail
+        image = Image.open(img_file, formats=IMAGE_OPEN_FORMATS)
+        # Reject decompression bombs from the header dimensions, before allocating pixels
+        if image.width * image.height > MAX_IMAGE_PIXELS:
+            return None, None, f"{img_file.name}: Image dimensions too large"
+
+        # An RGB JPEG that already fits the box needs no decode/encode at all. Only a
+        # bare JFIF file qualifies: any other APPn/COM segment (EXIF, XMP with GPS, ICC,
+        # comments) goes through re-encoding so it is stripped, and an explicit
+        # optimize request still gets its Huffman pass
+        if (not optimize and image.format == 'JPEG' and image.mode == 'RGB'
+                and all(marker == 'APP0' for marker, _ in image.applist)
+                and image.width <= t_width and image.height <= t_height):
+            return new_name, img_file.getvalue(), None
+
+        pyvips = load_pyvips()
+        if pyvips is not None:
+            return new_name, encode_with_vips(pyvips, img_file, t_width, t_height, optimize), None
+
+        if image.format == 'JPEG':
+            # Let libjpeg downscale in the DCT domain (1/2, 1/4, 1/8) while decoding.
+            # Stop at 2x the target (matching reducing_gap) so the final resample still
+            # has headroom to anti-alias; decoding straight to RGB also skips convert()
+            image.draft('RGB', (t_width * 2, t_height * 2))
+        # Covers RGBA/P/L as well as CMYK, LA, I;16; a no-op after draft('RGB')
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        # thumbnail() first shrinks by an integer factor with reduce() (reducing_gap),
+        # so the chosen filter only runs over the last <2x of the downscale
+        image.thumbnail((t_width, t_height), resample, reducing_gap=2.0)
+
+        img_byte = io.BytesIO()
+        # optimize=True adds a second Huffman pass: ~2x encode time for a few % smaller files
+        image.save(img_byte, format='JPEG', quality=85, optimize=optimize, progressive=False, subsampling=2)
+
+        # getbuffer() hands the encoded bytes to the ZIP writer without a getvalue() copy
+        return new_name, img_byte.getbuffer(), None
+
+    except Image.DecompressionBombError:
+        # Pillow's own guard fires inside open() for extreme sizes
+        return None, None, f"{img_file.name}: Image dimensions too large"
+    except Exception as e:
+        return None, None, f"{img_file.name}: {str(e)}"
 
 
 # ========== Main Application ==========
 def main():
+    # Page setup runs inside main() so it is re-emitted on every rerun, including
+    # when the app is launched through the src/app_ui.py shim (module import is cached)
+    st.set_page_config(**PAGE_CONFIG)
+    inject_global_styles()
+
     # Sidebar Configuration
     with st.sidebar:
         st.header("⚙️ Configuration")
@@ -284,7 +306,7 @@ def main():
                 "Gemini API Key",
                 type="password",
                 placeholder="Required for AI insights",
-                help="Your API key is used only for this session and not stored."
+                help="Your API key is never written to disk; it is held in server memory for at most an hour."
             )
             if not api_key:
                 st.warning("⚠️ API Key required for Data Cleaner AI summary.")
@@ -339,13 +361,26 @@ def main():
                     st.error(f"❌ File too large. Limit is {MAX_FILE_SIZE / 1024 / 1024}MB")
                     st.stop()
 
+                # Cheap 4-byte header check before pulling the whole upload into pandas
                 file_ext = os.path.splitext(uploaded_file.name)[1].lower()
-                temp_path = save_uploaded_file_secure(uploaded_file, file_ext)
+                if file_ext not in ALLOWED_EXCEL_EXTENSIONS:
+                    st.error("❌ Only Excel files (.xlsx, .xls) are supported")
+                    st.stop()
+                if not validate_file_magic(uploaded_file, EXCEL_MAGIC_NUMBERS[file_ext]):
+                    st.error("❌ File does not look like a valid Excel workbook")
+                    st.stop()
+
+                # Parse straight from the in-memory upload, no temp file round-trip.
+                # getvalue() is taken once: st.cache_data needs hashable bytes (not a
+                # memoryview), and CPython shares the buffer rather than copying it, as
+                # does io.BytesIO(file_bytes) for every read below
+                file_bytes = uploaded_file.getvalue()
 
                 # Preview
                 st.markdown("#### Raw Data Preview")
-                df_raw = pd.read_excel(temp_path, nrows=5)
-                st.dataframe(df_raw, use_container_width=True)
+                # One full parse serves the preview, the column list and the cleaning run
+                df_raw = read_excel_cached(file_bytes)
+                st.dataframe(df_raw.head(), use_container_width=True)
 
                 # ========== Column Mapping UI ==========
                 st.markdown("---")
@@ -357,55 +392,43 @@ def main():
                 )
                 
                 # Get all columns from the full dataset
-                df_all_cols = pd.read_excel(temp_path, nrows=0)
-                raw_columns = df_all_cols.columns.tolist()
-                
-                # Get field options for dropdowns
-                field_options_display = get_field_options_by_category()
-                field_keys = [opt[0] for opt in field_options_display]
-                field_labels = [opt[1] for opt in field_options_display]
+                raw_columns = df_raw.columns.tolist()
                 
                 # Create mapping configuration with smart pre-selection
                 col_map_config = {}
                 
-                # Use expander for cleaner UI when there are many columns
+                # One data_editor grid instead of a selectbox widget per column
                 with st.expander("🔽 展开/收起映射配置 (Expand/Collapse Mapping)", expanded=True):
-                    # Display columns in a 3-column grid
-                    num_cols = len(raw_columns)
-                    cols_per_row = 3
-                    
-                    for i in range(0, num_cols, cols_per_row):
-                        cols = st.columns(cols_per_row)
-                        
-                        for j in range(cols_per_row):
-                            idx = i + j
-                            if idx >= num_cols:
-                                break
-                            
-                            raw_col = raw_columns[idx]
-                            
-                            with cols[j]:
-                                # Smart detection for this column
-                                detected_field = detect_standard_field(raw_col)
-                                
-                                # Find the index of the detected field in options
-                                try:
-                                    default_index = field_keys.index(detected_field)
-                                except ValueError:
-                                    default_index = 0  # Default to "Ignore"
-                                
-                                # Create selectbox with smart pre-selection
-                                selected = st.selectbox(
-                                    f"📄 原始列 | Column: **{raw_col}**",
-                                    options=field_keys,
-                                    format_func=lambda x: dict(field_options_display).get(x, x),
-                                    index=default_index,
-                                    key=f"map_{idx}_{raw_col}"
-                                )
-                                
-                                # Store mapping if not "Ignore"
-                                if selected != "Ignore":
-                                    col_map_config[raw_col] = selected
+                    import pandas as pd
+
+                    mapping_df = pd.DataFrame({
+                        "Column": [str(c) for c in raw_columns],
+                        # Smart detection pre-selects each row
+                        "Mapped": [FIELD_LABELS.get(detect_standard_field(c), FIELD_LABELS["Ignore"]) for c in raw_columns],
+                    })
+                    edited_mapping = st.data_editor(
+                        mapping_df,
+                        column_config={
+                            "Column": st.column_config.TextColumn("📄 原始列 | Column"),
+                            "Mapped": st.column_config.SelectboxColumn(
+                                "标准字段 | Standard Field",
+                                options=list(FIELD_LABELS.values()),
+                                required=True
+                            ),
+                        },
+                        disabled=["Column"],
+                        hide_index=True,
+                        use_container_width=True,
+                        # Keyed on the header so a new file does not inherit stale edits
+                        key=f"map_editor_{hash(tuple(mapping_df['Column']))}"
+                    )
+
+                    # Rows keep their order, so zip back onto the original (possibly non-str) labels
+                    for raw_col, label in zip(raw_columns, edited_mapping["Mapped"]):
+                        selected = FIELD_KEYS_BY_LABEL.get(label, "Ignore")
+                        # Store mapping if not "Ignore"
+                        if selected != "Ignore":
+                            col_map_config[raw_col] = selected
                 
                 # Display mapping summary
                 if col_map_config:
@@ -429,8 +452,13 @@ def main():
                 if st.button("🚀 Start Cleaning Pipeline", key="clean_btn"):
                     with st.spinner("Analyzing and cleaning data... this may take a moment"):
                         try:
-                            cleaner = DataCleaner(api_key=api_key if api_key else None)
-                            df_cleaned, summary = cleaner.clean_excel(temp_path, user_mapping=col_map_config)
+                            try:
+                                df_cleaned, summary = clean_excel_cached(
+                                    file_bytes, api_key if api_key else None, col_map_config
+                                )
+                            except UncachedCleaningResult as e:
+                                df_cleaned, summary = e.result
+                            df_cleaned = downcast_dataframe(df_cleaned)
 
                             st.success("✅ Cleaning Complete!")
 
@@ -449,13 +477,9 @@ def main():
                                     st.warning("AI Summary skipped (No API Key).")
 
                             # Download
-                            output = io.BytesIO()
-                            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                                df_cleaned.to_excel(writer, index=False)
-
                             st.download_button(
                                 label="📥 Download Cleaned Excel",
-                                data=output.getvalue(),
+                                data=to_excel_bytes(df_cleaned),
                                 file_name=f"cleaned_{sanitize_filename(uploaded_file.name)}",
                                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                             )
@@ -466,9 +490,6 @@ def main():
 
             except Exception as e:
                 st.error(f"Error loading file: {e}")
-            finally:
-                if 'temp_path' in locals() and os.path.exists(temp_path):
-                    os.remove(temp_path)
 
     # ========== Tab 2: Image Processor ==========
     with tab2:
@@ -505,36 +526,48 @@ def main():
                     t_width = st.number_input("Target Width (px)", value=600, min_value=100)
                 with sc2:
                     t_height = st.number_input("Target Height (px)", value=800, min_value=100)
+                resample_label = st.selectbox(
+                    "Resize Quality",
+                    options=list(RESAMPLING_OPTIONS),
+                    help="Bilinear is several times faster than Lanczos with little visible difference at web sizes."
+                )
+                resample = RESAMPLING_OPTIONS[resample_label]
+                optimize_jpeg = st.checkbox("Optimize JPEG Huffman tables (slower, smaller)", value=False)
 
             if st.button("⚡ Process All Images", key="img_proc_btn"):
+                import zipfile
+                from PIL import Image
+
+                log_image_backend()
+                resample_filter = Image.Resampling[resample]
                 with st.spinner(f"Processing {len(uploaded_images)} images..."):
-                    zip_buffer = io.BytesIO()
+                    zip_buffer = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_SIZE)
                     success_count = 0
                     errors = []
-
-                    with zipfile.ZipFile(zip_buffer, "w") as zf:
-                        for img_file in uploaded_images:
-                            try:
-                                if img_file.size > MAX_IMAGE_SIZE:
-                                    errors.append(f"{img_file.name}: Exceeds 5MB")
-                                    continue
-
-                                image = Image.open(img_file)
-                                if image.mode in ('RGBA', 'P', 'L'):
-                                    image = image.convert('RGB')
-
-                                image.thumbnail((t_width, t_height), Image.Resampling.LANCZOS)
-
-                                img_byte = io.BytesIO()
-                                image.save(img_byte, format='JPEG', quality=85, optimize=True)
-
-                                safe_name = sanitize_filename(img_file.name)
-                                new_name = os.path.splitext(safe_name)[0] + ".jpg"
-                                zf.writestr(new_name, img_byte.getvalue())
-                                success_count += 1
-
-                            except Exception as e:
-                                errors.append(f"{img_file.name}: {str(e)}")
+                    results = [None] * len(uploaded_images)
+                    progress = st.progress(0.0)
+
+                    max_workers = min(os.cpu_count() or 1, len(uploaded_images))
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        futures = {
+                            executor.submit(
+                                process_single_image, img_file, t_width, t_height, resample_filter, optimize_jpeg
+                            ): idx
+                            for idx, img_file in enumerate(uploaded_images)
+                        }
+                        for done, future in enumerate(as_completed(futures), start=1):
+                            results[futures[future]] = future.result()
+                            progress.progress(done / len(uploaded_images))
+
+                    # ZipFile is not thread-safe, so assemble the archive on the main thread
+                    # JPEG is already compressed; STORED avoids a wasted deflate pass
+                    with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+                        for new_name, data, err in results:
+                            if err:
+                                errors.append(err)
+                                continue
+                            zf.writestr(new_name, data)
+                            success_count += 1
 
                     if success_count > 0:
                         st.success(f"🎉 Successfully processed {success_count} images!")
@@ -543,14 +576,16 @@ def main():
                             for err in errors:
                                 st.write(err)
 
+                        zip_buffer.seek(0)
                         st.download_button(
                             label="📦 Download Batch (ZIP)",
-                            data=zip_buffer.getvalue(),
+                            data=zip_buffer.read(),
                             file_name="processed_images.zip",
                             mime="application/zip"
                         )
                     else:
                         st.error("❌ No images were successfully processed.")
+                    zip_buffer.close()
 
 
 if __name__ == "__main__":
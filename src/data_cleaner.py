@@ -1,13 +1,62 @@
+import numpy as np
 import pandas as pd
 from google import genai
 from google.genai.errors import APIError
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Prefer the Rust-backed calamine reader (pandas >= 2.2); it is far faster than
+# openpyxl and also reads legacy .xls files
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_READ_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_READ_ENGINE = 'openpyxl'
+
+# Currency symbols, commas (English/Chinese) and whitespace stripped from numeric fields
+CURRENCY_SYMBOLS_RE = re.compile(r'[$,¥￥,，\s]')
+
+# Unambiguous date layouts that can be parsed with an explicit format; day/month
+# order is ambiguous for the rest, so those are left to format='mixed'
+DATE_FORMAT_PATTERNS = [
+    (re.compile(r'^\d{4}-\d{2}-\d{2}$'), '%Y-%m-%d'),
+    (re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$'), '%Y-%m-%d %H:%M:%S'),  # Excel-typed dates
+    (re.compile(r'^\d{4}/\d{2}/\d{2}$'), '%Y/%m/%d'),
+    (re.compile(r'^\d{4}\.\d{2}\.\d{2}$'), '%Y.%m.%d'),
+]
+DATE_FORMAT_SAMPLE_SIZE = 50
+
+# Anything that is not a digit or a common phone separator
+PHONE_STRIP_RE = re.compile(r'[^\d+\-() ]')
+
+# List of invalid names/artifacts to remove from CustomerName (case-insensitive)
+INVALID_NAMES = ['double clean']
+INVALID_NAME_RE = re.compile('|'.join(re.escape(name) for name in INVALID_NAMES), re.IGNORECASE)
+
+# IsValid values (lowercased) treated as True
+TRUTHY_VALUES = frozenset({'true', '1', 'yes', '是', 'y', 't'})
+
+# Row cap for the summary statistics; larger frames are described from a sample
+MAX_STATS_ROWS = 10_000
+
+# Prefixes of the messages generate_summary returns when the Gemini call fails
+SUMMARY_ERROR_PREFIXES = ("AI Error:", "Error generating summary:")
+
+# Common email typos mapped to '@': '#', full-width hash and full-width @
+EMAIL_TYPO_TABLE = str.maketrans({'#': '@', '＃': '@', '＠': '@'})
+
+
+def is_summary_error(summary):
+    """True if generate_summary returned an error message instead of a summary"""
+    return isinstance(summary, str) and summary.startswith(SUMMARY_ERROR_PREFIXES)
+
+
 class DataCleaner:
     def __init__(self, api_key=None, model="gemini-2.0-flash-exp"):
         """Initalize the DataCleaner with Gemini API Client."""
@@ -32,28 +81,34 @@ class DataCleaner:
         Reads Excel -> Cleans Data -> Generates AI Summary -> Saves Output.
 
         Args:
-            file_path: Path to the Excel file
+            file_path: Path to the Excel file, a file-like object (e.g. io.BytesIO),
+                       or an already-parsed DataFrame (used as-is, not copied)
             output_path: Optional output path for cleaned file
             user_mapping: Dictionary mapping original column names to standard fields
                          e.g., {"薪资": "TotalPrice", "年龄": "Age"}
         """
-        if not os.path.exists(file_path):
-            print(f"❌ Error: File not found at {file_path}")
-            return None, "File not found"
-
-        print(f"📂 Reading file: {file_path}")
-        try:
-            df = pd.read_excel(file_path, engine='openpyxl')
-        except Exception as e:
-            print(f"❌ Error reading Excel: {e}")
-            return None, f"Error reading file: {e}"
+        if isinstance(file_path, pd.DataFrame):
+            # Caller already parsed the workbook (e.g. for a preview); skip re-parsing
+            df = file_path
+        else:
+            is_path = isinstance(file_path, (str, os.PathLike))
+            if is_path and not os.path.exists(file_path):
+                print(f"❌ Error: File not found at {file_path}")
+                return None, "File not found"
+
+            print(f"📂 Reading file: {file_path if is_path else 'in-memory upload'}")
+            try:
+                df = pd.read_excel(file_path, engine=EXCEL_READ_ENGINE)
+            except Exception as e:
+                print(f"❌ Error reading Excel: {e}")
+                return None, f"Error reading file: {e}"
 
         # Cleaning Log
         logs = []
 
         # 1. Drop Empty Rows
         initial_rows = len(df)
-        df.dropna(how='all', inplace=True)
+        df = df.dropna(how='all')
         rows_removed = initial_rows - len(df)
         if rows_removed > 0:
             logs.append(f"Removed {rows_removed} completely empty rows.")
@@ -61,7 +116,7 @@ class DataCleaner:
         # 2. Apply Column Mapping
         if user_mapping:
             # Use user-provided mapping
-            df.rename(columns=user_mapping, inplace=True)
+            df = df.rename(columns=user_mapping)
             logs.append(f"Applied user column mapping: {len(user_mapping)} columns mapped.")
             logs.append(f"Mapped fields: {', '.join(user_mapping.values())}")
         else:
@@ -79,7 +134,7 @@ class DataCleaner:
                 '消费金额': 'TotalPrice',
                 '薪资': 'TotalPrice'
             }
-            df.rename(columns=column_mapping, inplace=True)
+            df = df.rename(columns=column_mapping)
             logs.append("Applied default column mapping (backward compatibility mode).")
 
         # 3. Post-Mapping Standardization (Critical Fallback)
@@ -92,7 +147,7 @@ class DataCleaner:
         
         for source, target in fallback_mapping.items():
             if source in df.columns and target not in df.columns:
-                df.rename(columns={source: target}, inplace=True)
+                df = df.rename(columns={source: target})
                 logs.append(f"Auto-mapped leftover column '{source}' to '{target}' for cleaning.")
 
         # Helper function to check if field exists
@@ -114,32 +169,50 @@ class DataCleaner:
             'Salary': '薪资'
         }
 
-        for field, label in numeric_fields.items():
-            if has_field(field):
-                original_count = len(df)
-                df[field] = df[field].astype(str).str.replace(r'[$,¥￥,，\s]', '', regex=True)  # Also remove commas (English/Chinese) and spaces
-                df[field] = pd.to_numeric(df[field], errors='coerce')
-
-                # For financial fields, replace NaN with 0 instead of dropping rows
-                # This preserves data rows even if the value couldn't be converted
-                invalid_count = df[field].isna().sum()
-                if field in ['TotalPrice', 'UnitPrice', 'Revenue', 'Cost']:
-                    if invalid_count > 0:
-                        df[field].fillna(0, inplace=True)
-                        logs.append(f"Cleaned '{field}' ({label}): Removed symbols and commas, converted to numeric. {invalid_count} invalid values replaced with 0 (rows preserved).")
-                    else:
-                        logs.append(f"Cleaned '{field}' ({label}): Removed currency symbols and commas, converted to numeric.")
+        financial_fields = ['TotalPrice', 'UnitPrice', 'Revenue', 'Cost']
+
+        # Convert all present numeric fields in one block instead of column by column
+        present_numeric = [field for field in numeric_fields if has_field(field)]
+        if present_numeric:
+            # Columns Excel already typed as numbers need no string round-trip
+            text_numeric = [
+                field for field in present_numeric
+                if not pd.api.types.is_numeric_dtype(df[field]) or pd.api.types.is_bool_dtype(df[field])
+            ]
+            if text_numeric:
+                df[text_numeric] = df[text_numeric].astype(str).replace(CURRENCY_SYMBOLS_RE, '', regex=True)
+            df[present_numeric] = df[present_numeric].apply(pd.to_numeric, errors='coerce')
+            invalid_counts = df[present_numeric].isna().sum()
+
+            # For financial fields, replace NaN with 0 instead of dropping rows
+            # This preserves data rows even if the value couldn't be converted
+            present_financial = [field for field in present_numeric if field in financial_fields]
+            if present_financial:
+                df[present_financial] = df[present_financial].fillna(0)
+
+        for field in present_numeric:
+            label = numeric_fields[field]
+            invalid_count = invalid_counts[field]
+            if field in financial_fields:
+                if invalid_count > 0:
+                    logs.append(f"Cleaned '{field}' ({label}): Removed symbols and commas, converted to numeric. {invalid_count} invalid values replaced with 0 (rows preserved).")
                 else:
-                    logs.append(f"Cleaned '{field}' ({label}): Converted to numeric format.")
+                    logs.append(f"Cleaned '{field}' ({label}): Removed currency symbols and commas, converted to numeric.")
+            else:
+                logs.append(f"Cleaned '{field}' ({label}): Converted to numeric format.")
 
         # 4. Clean Age Field with Filtering
         if has_field('Age'):
             original_count = len(df)
-            df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
+            ages = pd.to_numeric(df['Age'], errors='coerce')
             # Only filter out obviously invalid ages (negative or unreasonably high), not all < 18
             # This allows business scenarios that may need younger ages
-            invalid_age_count = len(df[(df['Age'] < 0) | (df['Age'] > 150)])
-            df = df[(df['Age'] >= 0) & (df['Age'] <= 150)]
+            # One mask serves both the count and the filter (NaN ages are dropped, not counted)
+            valid_age = ages.between(0, 150)
+            invalid_age_count = int((~valid_age & ages.notna()).sum())
+            # Filter and replace the column in one step, so no write ever lands on a
+            # filtered view. Whole-number ages in 0-150 fit in uint8; fractional ages stay float
+            df = df[valid_age].assign(Age=pd.to_numeric(ages[valid_age], downcast='unsigned'))
             if invalid_age_count > 0:
                 logs.append(f"Processed 'Age': Converted to numeric and filtered out {invalid_age_count} records with invalid age (negative or > 150).")
             else:
@@ -154,66 +227,42 @@ class DataCleaner:
                 # Handle relative dates (Yesterday, Today, Tomorrow)
                 # Normalize case for checking
                 df[date_field] = df[date_field].astype(str)
-                
-                def parse_relative_date(val):
-                    val_lower = str(val).lower().strip()
-                    today = datetime.now()
-                    if val_lower == 'yesterday':
-                        return (today - timedelta(days=1)).strftime('%Y-%m-%d')
-                    elif val_lower == 'today':
-                        return today.strftime('%Y-%m-%d')
-                    elif val_lower == 'tomorrow':
-                        return (today + timedelta(days=1)).strftime('%Y-%m-%d')
-                    return val
-
-                # Apply relative date parsing BEFORE standard parsing
-                from datetime import datetime, timedelta
-                df[date_field] = df[date_field].apply(parse_relative_date)
-
-                # Try multiple date formats for better compatibility
-                # First, try common formats explicitly
-                date_formats = [
-                    '%Y-%m-%d',      # 2023-01-01
-                    '%Y/%m/%d',      # 2023/02/15
-                    '%m-%d-%Y',      # 03-20-2023
-                    '%d-%m-%Y',      # 20-03-2023
-                    '%Y.%m.%d',      # 2024.05.12
-                    '%m/%d/%Y',      # 03/20/2023
-                    '%d/%m/%Y',      # 20/03/2023
-                ]
-
-                # Try pandas auto-parsing first (most flexible)
-                # Use infer_datetime_format for better format inference
-                try:
-                    # Try with format='mixed' (pandas 2.0+)
-                    df[date_field] = pd.to_datetime(df[date_field], errors='coerce', format='mixed')
-                except TypeError:
-                    # Fallback for older pandas versions
-                    df[date_field] = pd.to_datetime(df[date_field], errors='coerce', infer_datetime_format=True)
-
-                # If auto-parsing failed for some rows, try explicit formats
-                if df[date_field].isna().any():
-                    na_mask = df[date_field].isna()
-                    for date_format in date_formats:
-                        if not na_mask.any():
-                            break
-                        try:
-                            # Only try to parse rows that are still NaN
-                            parsed_dates = pd.to_datetime(
-                                df.loc[na_mask, date_field],
-                                errors='coerce',
-                                format=date_format
-                            )
-                            # Update only successfully parsed dates
-                            df.loc[na_mask, date_field] = parsed_dates
-                            na_mask = df[date_field].isna()
-                        except (ValueError, TypeError):
-                            continue
+
+                # Apply relative date parsing BEFORE standard parsing, as a vectorized
+                # lookup rather than a Python call per row
+                today = datetime.now()
+                relative_dates = {
+                    'yesterday': (today - timedelta(days=1)).strftime('%Y-%m-%d'),
+                    'today': today.strftime('%Y-%m-%d'),
+                    'tomorrow': (today + timedelta(days=1)).strftime('%Y-%m-%d'),
+                }
+                replaced = df[date_field].str.strip().str.lower().map(relative_dates)
+                df[date_field] = replaced.fillna(df[date_field])
+
+                # Parse the whole column once with the dominant format (fast, no inference),
+                # then let format='mixed' handle only the rows that did not match it
+                raw_dates = df[date_field]
+                date_format = self._detect_date_format(raw_dates)
+                if date_format:
+                    parsed = pd.to_datetime(raw_dates, errors='coerce', format=date_format)
+                else:
+                    parsed = pd.Series(pd.NaT, index=raw_dates.index, dtype='datetime64[ns]')
+
+                na_mask = parsed.isna()
+                if na_mask.any():
+                    try:
+                        # format='mixed' (pandas 2.0+) infers the format per element
+                        fallback = pd.to_datetime(raw_dates[na_mask], errors='coerce', format='mixed')
+                    except TypeError:
+                        # Fallback for older pandas versions
+                        fallback = pd.to_datetime(raw_dates[na_mask], errors='coerce', infer_datetime_format=True)
+                    parsed = parsed.fillna(fallback)
+                df[date_field] = parsed
 
                 # Only drop rows where date is completely invalid (not just unparseable)
                 # This is more lenient - we keep rows even if date parsing fails
                 # Uncomment the following line if you want strict date validation:
-                # df.dropna(subset=['OrderDate'], inplace=True)
+                # df = df.dropna(subset=['OrderDate'])
 
                 parsed_count = df[date_field].notna().sum()
                 if original_count > parsed_count:
@@ -233,14 +282,10 @@ class DataCleaner:
                 
                 # Filter out invalid names
                 if field == 'CustomerName':
-                    # List of invalid names/artifacts to remove
-                    invalid_names = ['double clean']
-                    # Create a case-insensitive regex pattern
-                    pattern = '|'.join([re.escape(name) for name in invalid_names])
                     # Replace matches with empty string or NaN (here we use replace to make them empty, which might be cleaner for display, or NaN)
                     # Let's replace with NaN so they can be handled or dropped if needed, or just kept as empty
                     # Based on user request "clean out", usually means treating as invalid.
-                    mask = df[field].str.contains(pattern, case=False, na=False)
+                    mask = df[field].str.contains(INVALID_NAME_RE, na=False)
                     if mask.any():
                         cleaned_count = mask.sum()
                         df.loc[mask, field] = "" # Clear the value
@@ -264,21 +309,15 @@ class DataCleaner:
 
         # 8. Clean Phone Field
         if has_field('Phone'):
-            df['Phone'] = df['Phone'].astype(str).str.replace(r'[^\d+\-() ]', '', regex=True).str.strip()
+            df['Phone'] = df['Phone'].astype(str).str.replace(PHONE_STRIP_RE, '', regex=True).str.strip()
             logs.append(f"Cleaned 'Phone': Removed special characters, kept only digits and common separators.")
 
         # 9. Clean Email Field
         if has_field('Email'):
             # Fix common email format errors before validation
             original_count = len(df)
-            df['Email'] = df['Email'].astype(str).str.strip().str.lower()
-
-            # Fix common typos: replace '#' with '@'
-            df['Email'] = df['Email'].str.replace('#', '@', regex=False)
-
-            # Fix other common separators that should be '@'
-            df['Email'] = df['Email'].str.replace('＃', '@', regex=False)  # Full-width hash
-            df['Email'] = df['Email'].str.replace('＠', '@', regex=False)  # Full-width @
+            # Fix common typos ('#', full-width '＃'/'＠' -> '@') in a single translate pass
+            df['Email'] = df['Email'].astype(str).str.strip().str.lower().str.translate(EMAIL_TYPO_TABLE)
 
             # Optional: Remove rows with clearly invalid emails after fixing
             # Uncomment the following lines if you want to filter out emails that still don't match the pattern
@@ -302,12 +341,18 @@ class DataCleaner:
 
         for field, label in status_fields.items():
             if has_field(field):
-                df[field] = df[field].astype(str).str.strip()
+                # A handful of distinct labels: store as categorical codes
+                df[field] = df[field].astype(str).str.strip().astype('category')
                 logs.append(f"Cleaned '{field}' ({label}): Trimmed whitespace and standardized format.")
 
         # 11. Clean IsValid Field (Convert to Boolean)
         if has_field('IsValid'):
-            df['IsValid'] = df['IsValid'].astype(str).str.lower().isin(['true', '1', 'yes', '是', 'y', 't'])
+            # Lowercase and test only the distinct values, then broadcast back via the codes.
+            # Blank cells get code -1 (astype(str) keeps NaN on pandas 3), which indexes
+            # the appended False sentinel, even when there are no categories at all
+            is_valid = df['IsValid'].astype(str).astype('category')
+            truthy = np.append(is_valid.cat.categories.str.lower().isin(TRUTHY_VALUES), False)
+            df['IsValid'] = truthy[is_valid.cat.codes.to_numpy()]
             logs.append(f"Cleaned 'IsValid': Converted to boolean (True/False).")
 
         # 12. Clean Text/Notes Fields
@@ -324,7 +369,14 @@ class DataCleaner:
                 df[field] = df[field].astype(str).str.strip()
                 logs.append(f"Cleaned '{field}' ({label}): Trimmed whitespace.")
 
-        # 13. Deduplication (based on available identifier fields)
+        # 13. Store pure-text columns as Arrow-backed strings: contiguous buffers instead of
+        # one PyObject per cell, and faster hashing for the deduplication below.
+        # Mixed-type columns stay object so numbers are not turned into text
+        for col in df.columns[df.dtypes == object]:
+            if pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+                df[col] = df[col].astype('string[pyarrow]')
+
+        # 14. Deduplication (based on available identifier fields)
         dedup_fields = []
         if has_field('SaleID'):
             dedup_fields.append('SaleID')
@@ -335,7 +387,7 @@ class DataCleaner:
 
         if dedup_fields:
             initial_unique = len(df)
-            df.drop_duplicates(subset=dedup_fields, keep='first', inplace=True)
+            df = df.drop_duplicates(subset=dedup_fields, keep='first')
             duplicates_removed = initial_unique - len(df)
             if duplicates_removed > 0:
                 logs.append(f"Removed {duplicates_removed} duplicate records based on: {', '.join(dedup_fields)}.")
@@ -343,25 +395,64 @@ class DataCleaner:
         print("✅ Data Cleaning Complete.")
 
         # Generate AI Summary
-        summary = self.generate_summary(df, logs)
+        if output_path:
+            # Overlap the Gemini round-trip with the file write; they do not depend on each other
+            executor = ThreadPoolExecutor(max_workers=1)
+            summary_future = executor.submit(self.generate_summary, df, logs)
+            try:
+                self._save_output(df, output_path)
+            finally:
+                # A failed write is raised right away instead of after the summary returns
+                executor.shutdown(wait=False)
+            summary = summary_future.result()
+        else:
+            summary = self.generate_summary(df, logs)
+
         print("\n🤖 AI Summary Report:")
         print(summary)
 
-        # Save Output
-        if output_path:
-            df.to_excel(output_path, index=False)
-            print(f"\n💾 Cleaned data saved to: {output_path}")
-
         return df, summary
 
+    def _save_output(self, df, output_path):
+        """Write the cleaned data as Parquet for a .parquet path, otherwise as an Excel workbook"""
+        if str(output_path).lower().endswith('.parquet'):
+            # Arrow's columnar writer: much faster and smaller than a workbook.
+            # Mixed-type columns (kept as object in step 13) have no single Arrow
+            # type, so they are written as text in the file only
+            mixed_columns = df.columns[df.dtypes == object]
+            df.astype({col: 'string' for col in mixed_columns}).to_parquet(
+                output_path, engine='pyarrow', compression='zstd', index=False
+            )
+        else:
+            df.to_excel(output_path, index=False)
+        print(f"\n💾 Cleaned data saved to: {output_path}")
+
+    @staticmethod
+    def _detect_date_format(values):
+        """Return the explicit format matching most of a sample of date strings, or None."""
+        sample = values[~values.isin(['nan', 'NaT', 'None', ''])].head(DATE_FORMAT_SAMPLE_SIZE)
+        best_format, best_count = None, 0
+        for pattern, date_format in DATE_FORMAT_PATTERNS:
+            count = sample.str.match(pattern).sum()
+            if count > best_count:
+                best_format, best_count = date_format, count
+        return best_format
+
     def generate_summary(self, df, cleaning_steps):
         """Uses Gemini to generate a human-readable summary of the cleaning process and data insights."""
         if not self.client:
             return "AI Summary Skipped (Client not initialized)."
 
-        stats = df.describe(include='all').to_markdown()
+        # Compact snapshot for the prompt: numeric stats plus text-column cardinality,
+        # instead of describe(include='all') over every column
+        numeric_df = df.select_dtypes(include='number')
+        if len(numeric_df) > MAX_STATS_ROWS:
+            numeric_df = numeric_df.sample(MAX_STATS_ROWS, random_state=0)
+        stats = numeric_df.describe().round(2).to_markdown() if not numeric_df.empty else "No numeric columns."
+        text_df = df.select_dtypes(include=['object', 'string', 'category'])
+        cardinality = text_df.nunique().to_frame('unique_values').to_markdown() if not text_df.empty else "No text columns."
         steps_str = "\n".join([f"- {s}" for s in cleaning_steps])
-        sample = df.head(5).to_markdown()
+        sample = df.sample(min(5, len(df)), random_state=0).to_markdown()
 
         prompt = f"""
         You are a Data Analyst. Please summarize the following data processing task.
@@ -372,6 +463,9 @@ class DataCleaner:
         --- Data Statistics (Cleaned) ---
         {stats}
 
+        --- Text Column Cardinality ---
+        {cardinality}
+
         --- Sample Data ---
         {sample}
 
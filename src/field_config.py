@@ -3,6 +3,8 @@ Field Configuration Module
 Centralized field definitions and keyword mappings for column mapping feature.
 """
 
+import functools
+
 # Standard field categories and their display names (bilingual)
 FIELD_CATEGORIES = {
     "ignore": {"en": "Ignore", "zh": "忽略"},
@@ -261,10 +263,67 @@ STANDARD_FIELDS = {
 }
 
 
+# Keyword index built once at import instead of lower()-ing every keyword per column
+KEYWORD_ENTRIES = [  # (keyword_lower, field_key) in STANDARD_FIELDS order
+    (keyword.lower(), field_key)
+    for field_key, field_info in STANDARD_FIELDS.items()
+    for keyword in field_info.get("keywords", [])
+]
+KEYWORD_EXACT_MATCH = {}
+for _keyword_lower, _field_key in KEYWORD_ENTRIES:
+    KEYWORD_EXACT_MATCH.setdefault(_keyword_lower, _field_key)
+# Longest keyword first; the stable sort keeps field order among equal lengths
+KEYWORD_PARTIAL_MATCH = sorted(KEYWORD_ENTRIES, key=lambda entry: -len(entry[0]))
+
+
+def detect_standard_field(column_name):
+    """
+    Automatically detect which standard field a column name matches.
+    Uses keyword matching with case-insensitive comparison.
+    
+    Args:
+        column_name: The original column name from Excel
+    
+    Returns:
+        The standard field key (e.g., "SaleID") or "Ignore" if no match
+    """
+    if not column_name:
+        return "Ignore"
+    
+    # Normalize once; the cached matcher below never touches str.lower()
+    return match_normalized_column(str(column_name).lower().strip())
+
+
+@functools.lru_cache(maxsize=512)
+def match_normalized_column(col_lower):
+    """
+    Match an already lower-cased, stripped column name against the keyword index.
+    Cached on the normalized form, so "Name" and " name " share one entry.
+    """
+    # Exact match gets highest priority
+    if col_lower in KEYWORD_EXACT_MATCH:
+        return KEYWORD_EXACT_MATCH[col_lower]
+    
+    # Column name contained in a keyword scores len(col_lower), which beats any
+    # keyword contained in the column (always shorter than a non-exact column name)
+    if len(col_lower) > 2:
+        for keyword_lower, field_key in KEYWORD_ENTRIES:
+            if col_lower in keyword_lower:
+                return field_key
+    
+    # Partial match (keyword contained in column name): longest keyword wins
+    for keyword_lower, field_key in KEYWORD_PARTIAL_MATCH:
+        if keyword_lower in col_lower:
+            return field_key
+    
+    return "Ignore"
+
+
+@functools.lru_cache(maxsize=1)
 def get_field_options_by_category():
     """
     Get field options organized by category for UI display.
-    Returns a list of tuples: (field_key, display_label)
+    Returns a tuple of (field_key, display_label) pairs, computed once and cached.
     """
     options = [("Ignore", "Ignore (忽略)")]
     
@@ -283,7 +342,7 @@ def get_field_options_by_category():
         if cat in categorized:
             options.extend(categorized[cat])
     
-    return options
+    return tuple(options)
 
 
 def get_field_display_name(field_key, language="zh"):
@@ -1,8 +1,67 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
 from io import BytesIO
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Optional libvips backend: streamed shrink-on-load resize, much lower peak RAM
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+
+# Parallel downloads; the session's connection pool is sized to match
+DOWNLOAD_WORKERS = 16
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.webp', '.bmp'})
+
+
+def vips_to_srgb(img):
+    """
+    Prepare a pyvips image for JPEG output, shared by the app and process_images:
+    drop alpha the same way Pillow's convert('RGB') does, then normalize to sRGB.
+    """
+    if img.hasalpha():
+        img = img.extract_band(0, n=img.bands - 1)
+    if img.interpretation != "srgb":
+        img = img.colourspace("srgb")
+    return img
+
+
+def _process_one(task):
+    """
+    Resize and re-encode a single image. Runs in a worker process, so it lives at
+    module level (picklable) and reports back instead of printing.
+    Returns (new_filename, error) where error is None on success.
+    """
+    img_path, output_dir, target_size, format = task
+    filename = os.path.basename(img_path)
+    new_filename = os.path.splitext(filename)[0] + ".jpg"
+    output_path = os.path.join(output_dir, new_filename)
+    try:
+        if pyvips is not None and format == "JPEG":
+            # size="down" matches Pillow's thumbnail(): fit inside the box, never enlarge
+            img = pyvips.Image.thumbnail(img_path, target_size[0], height=target_size[1], size="down")
+            img = vips_to_srgb(img)
+            img.write_to_file(output_path, Q=85, optimize_coding=True, strip=True)
+            return new_filename, None
+
+        with Image.open(img_path) as img:
+            # Convert to RGB (in case of RGBA PNGs) check for transparency
+            if img.mode in ('RGBA', 'P'):
+                img = img.convert('RGB')
+
+            # Resize (Thumbnail / Aspect Ratio Preserved)
+            img.thumbnail(target_size)
+
+            # Save
+            img.save(output_path, format=format, quality=85, optimize=True)
+        return new_filename, None
+    except Exception as e:
+        return filename, e
+
 
 class ImageProcessor:
     def __init__(self, input_dir="data/raw_images", output_dir="data/processed_images"):
@@ -13,18 +72,26 @@ class ImageProcessor:
         os.makedirs(self.input_dir, exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
 
+        # One pooled session for all downloads: keep-alive connections are reused
+        # across URLs instead of paying a TCP/TLS handshake per image
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=DOWNLOAD_WORKERS, pool_maxsize=DOWNLOAD_WORKERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
     def download_image(self, url, filename):
         """Downloads a single image from a URL."""
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
+            with self.session.get(url, timeout=10, stream=True) as response:
+                if response.status_code != 200:
+                    print(f"❌ Failed to download {url}: Status {response.status_code}")
+                    return None
                 image_path = os.path.join(self.input_dir, filename)
                 with open(image_path, 'wb') as f:
-                    f.write(response.content)
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
                 print(f"⬇️ Downloaded: {filename}")
                 return image_path
-            else:
-                print(f"❌ Failed to download {url}: Status {response.status_code}")
         except Exception as e:
             print(f"❌ Error downloading {url}: {e}")
         return None
@@ -32,7 +99,7 @@ class ImageProcessor:
     def batch_download(self, urls):
         """Downloads multiple images in parallel using threads."""
         print(f"🚀 Starting batch download for {len(urls)} images...")
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
             # Create filenames based on index
             futures = [
                 executor.submit(self.download_image, url, f"image_{i+1}.jpg")
@@ -50,30 +117,23 @@ class ImageProcessor:
         """
         print(f"⚙️ Processing images from {self.input_dir}...")
         
+        # scandir yields entries with cached file types, so no extra stat per name
+        with os.scandir(self.input_dir) as entries:
+            tasks = [
+                (entry.path, self.output_dir, target_size, format)
+                for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            ]
+
+        # Decoding/encoding is CPU-bound, so spread the files across processes
         processed_count = 0
-        for filename in os.listdir(self.input_dir):
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.bmp')):
-                img_path = os.path.join(self.input_dir, filename)
-                try:
-                    with Image.open(img_path) as img:
-                        # Convert to RGB (in case of RGBA PNGs) check for transparency
-                        if img.mode in ('RGBA', 'P'):
-                            img = img.convert('RGB')
-                        
-                        # Resize (Thumbnail / Aspect Ratio Preserved)
-                        img.thumbnail(target_size)
-                        
-                        # Create new filename
-                        new_filename = os.path.splitext(filename)[0] + ".jpg"
-                        output_path = os.path.join(self.output_dir, new_filename)
-                        
-                        # Save
-                        img.save(output_path, format=format, quality=85, optimize=True)
-                        processed_count += 1
-                        print(f"✅ Processed: {new_filename}")
-                        
-                except Exception as e:
-                    print(f"❌ Error processing {filename}: {e}")
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for name, error in executor.map(_process_one, tasks, chunksize=4):
+                if error is None:
+                    processed_count += 1
+                    print(f"✅ Processed: {name}")
+                else:
+                    print(f"❌ Error processing {name}: {error}")
         
         print(f"🎉 Batch processing complete. {processed_count} images saved to {self.output_dir}.")
 
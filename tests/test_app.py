@@ -0,0 +1,25 @@
+import io
+
+import pandas as pd
+
+from app import downcast_dataframe, to_excel_bytes
+
+
+def test_excel_download_round_trip():
+    df = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z'], 'c': [1.5, None, 3.25]})
+
+    restored = pd.read_excel(io.BytesIO(to_excel_bytes(df)))
+
+    pd.testing.assert_frame_equal(restored, df, check_dtype=False)
+
+
+def test_downcast_keeps_mixed_type_columns_as_object():
+    df = pd.DataFrame({
+        'Notes': [1, 'n/a', 1, 1, 2, 1, 1, 1],
+        'Kind': ['a', 'b', 'a', 'a', None, 'a', 'a', 'a'],
+    })
+
+    downcast = downcast_dataframe(df)
+
+    assert downcast['Notes'].dtype == object
+    assert isinstance(downcast['Kind'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from src.data_cleaner import DataCleaner
+
+
+def clean(df, **kwargs):
+    cleaned, _ = DataCleaner(api_key=None).clean_excel(df, **kwargs)
+    return cleaned
+
+
+def test_is_valid_blank_cell_is_false():
+    df = pd.DataFrame({'X': [1, 2, 3], 'IsValid': ['no', np.nan, 'yes']})
+
+    cleaned = clean(df)
+
+    assert cleaned['IsValid'].tolist() == [False, False, True]
+
+
+def test_is_valid_all_blank_cells_are_false():
+    df = pd.DataFrame({'X': [1, 2], 'IsValid': [np.nan, np.nan]})
+
+    cleaned = clean(df)
+
+    assert cleaned['IsValid'].tolist() == [False, False]
+
+
+def test_is_valid_truthy_values():
+    df = pd.DataFrame({'X': range(6), 'IsValid': ['TRUE', '1', 'Yes', '是', 'f', 0]})
+
+    cleaned = clean(df)
+
+    assert cleaned['IsValid'].tolist() == [True, True, True, True, False, False]
+
+
+def test_parquet_output_with_mixed_type_column(tmp_path):
+    df = pd.DataFrame({'SaleID': [1, 'A-5'], 'TotalPrice': ['$10', '20']})
+    output_path = tmp_path / 'cleaned.parquet'
+
+    cleaned = clean(df, output_path=str(output_path))
+
+    written = pd.read_parquet(output_path)
+    assert written['SaleID'].tolist() == ['1', 'A-5']
+    assert written['TotalPrice'].tolist() == [10.0, 20.0]
+    # Only the file is stringified; the returned frame keeps the original values
+    assert cleaned['SaleID'].tolist() == [1, 'A-5']
+
+
+def test_xlsx_output_round_trip(tmp_path):
+    df = pd.DataFrame({'SaleID': [1, 2, 3], 'City': [' a ', 'b', 'c'], 'TotalPrice': ['$10', '20', '¥30']})
+    output_path = tmp_path / 'cleaned.xlsx'
+
+    clean(df, output_path=str(output_path))
+
+    written = pd.read_excel(output_path)
+    assert written['SaleID'].tolist() == [1, 2, 3]
+    assert written['City'].tolist() == ['a', 'b', 'c']
+    assert written['TotalPrice'].tolist() == [10.0, 20.0, 30.0]
+
+
+def test_dedup_keeps_distinct_mixed_type_ids():
+    df = pd.DataFrame({'SaleID': [1, '1', 1], 'X': ['a', 'b', 'c']})
+
+    cleaned = clean(df)
+
+    assert cleaned['X'].tolist() == ['a', 'b']